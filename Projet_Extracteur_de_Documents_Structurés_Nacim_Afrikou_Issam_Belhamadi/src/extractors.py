@@ -1,5 +1,6 @@
 """Pipeline d'extraction de données depuis des fichiers non structurés via Structured Outputs."""
 
+import tempfile
 from pathlib import Path
 from typing import Optional
 
@@ -16,15 +17,47 @@ except ImportError:
 
 from .llm_client import (
     detect_document_type, extract_invoice_with_llm, extract_order_with_llm,
-    detect_document_type_from_image, extract_invoice_from_image, extract_order_from_image
+    detect_document_type_from_image, extract_invoice_from_image, extract_order_from_image,
+    extract_page_text_from_image
 )
 from .models import ExtractedDocument, Invoice, Order
 
 
+# En dessous de ce nombre de caractères, une page couverte par des images est considérée comme scannée
+MIN_PAGE_TEXT_CHARS = 20
+# Part minimale de la surface de la page couverte par des images (exclut logos et en-têtes)
+MIN_SCANNED_IMAGE_COVERAGE = 0.5
+# Résolution de rendu des pages scannées envoyées à GPT-4 Vision
+SCANNED_PAGE_RESOLUTION = 150
+
+
+def _is_scanned_page(page, text: str) -> bool:
+    """Vrai si la page a peu de texte et que des images en couvrent une grande partie."""
+    if len(text.strip()) >= MIN_PAGE_TEXT_CHARS:
+        return False
+    page_area = float(page.width * page.height)
+    image_area = sum(float(img["width"] * img["height"]) for img in page.images)
+    return page_area > 0 and image_area / page_area >= MIN_SCANNED_IMAGE_COVERAGE
+
+
 def _extract_text_from_pdf(path: Path) -> str:
-    """Lit et concatène le texte de toutes les pages d'un PDF."""
-    with pdfplumber.open(path) as pdf:
-        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    """Lit et concatène le texte de toutes les pages d'un PDF.
+
+    Les pages scannées (peu de texte, images couvrant au moins la moitié de la page)
+    sont rendues en image et transcrites via GPT-4 Vision, une page après l'autre ;
+    seules ces pages sont envoyées à l'API Vision. Une page numérique vide ou presque (séparateur,
+    « Page 2/2 » sous un logo) garde son texte natif.
+    """
+    pages_text = []
+    with pdfplumber.open(path) as pdf, tempfile.TemporaryDirectory() as tmp_dir:
+        for number, page in enumerate(pdf.pages, start=1):
+            text = page.extract_text() or ""
+            if _is_scanned_page(page, text):
+                image_path = Path(tmp_dir) / f"page_{number}.png"
+                page.to_image(resolution=SCANNED_PAGE_RESOLUTION).save(image_path)
+                text = extract_page_text_from_image(image_path)
+            pages_text.append(text)
+    return "\n".join(pages_text)
 
 
 def _extract_text_from_docx(path: Path) -> str:
@@ -91,6 +124,7 @@ def extract_document(path: Path) -> ExtractedDocument:
     """Point d'entrée : détecte le type puis extrait via Structured Output.
 
     1. Lit le texte brut du fichier (PDF, DOCX, TXT, CSV, Excel...) OU traite l'image avec GPT-4 Vision
+       (les pages scannées d'un PDF sont transcrites via GPT-4 Vision, page par page)
     2. Détecte le type (order / invoice) via LLM
     3. Extrait les champs avec le schéma Pydantic correspondant
     4. Retourne un objet Order ou Invoice validé automatiquement
@@ -110,6 +144,8 @@ def extract_document(path: Path) -> ExtractedDocument:
     
     # Sinon, extraction de texte classique
     text = _extract_text_from_file(path)
+    if not text.strip():
+        raise RuntimeError(f"Aucun texte exploitable dans {path.name}.")
     doc_type = detect_document_type(text)
 
     if doc_type == "invoice":
@@ -0,0 +1,471 @@
+"""Index local SQLite des documents extraits (commandes et factures).
+
+Les résultats JSON de data/output/ sont normalisés dans une base SQLite
+embarquée (tables d'en-têtes + tables de lignes) afin de répondre aux
+requêtes agrégées sans relire chaque fichier.
+
+Usage CLI :
+    python -m src.index build                      # indexe data/output/ (incrémental)
+    python -m src.index totals --type invoice --by customer --since 2018-04-01
+    python -m src.index orders --shipper "United Package"
+    python -m src.index sql "SELECT currency, COUNT(*) FROM orders GROUP BY currency"
+
+Chaque en-tête conserve le libellé `document_type` (en minuscules) : une facture
+extraite avec la forme d'une commande (champs order_*) est rangée dans `orders`
+avec document_type = 'invoice', et comptée par `totals --type invoice`.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path, PureWindowsPath
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    from .models import ExtractedDocument
+except ImportError:
+    from models import ExtractedDocument
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+OUTPUT_DIR = DATA_DIR / "output"
+INDEX_PATH = DATA_DIR / "index.sqlite"
+
+# À incrémenter à chaque modification du schéma : l'index (données dérivées) est alors reconstruit
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    doc_key         TEXT PRIMARY KEY,
+    source_file     TEXT,
+    document_type   TEXT,
+    order_id        TEXT,
+    order_date      TEXT,
+    shipped_date    TEXT,
+    customer_id     TEXT,
+    customer_name   TEXT,
+    employee_name   TEXT,
+    shipper_id      TEXT,
+    shipper_name    TEXT,
+    ship_city       TEXT,
+    ship_country    TEXT,
+    total_price     REAL,
+    currency        TEXT
+);
+CREATE TABLE IF NOT EXISTS order_lines (
+    doc_key         TEXT NOT NULL REFERENCES orders(doc_key) ON DELETE CASCADE,
+    line_no         INTEGER NOT NULL,
+    description     TEXT,
+    quantity        REAL,
+    unit_price      REAL,
+    line_total      REAL,
+    PRIMARY KEY (doc_key, line_no)
+);
+CREATE TABLE IF NOT EXISTS invoices (
+    doc_key         TEXT PRIMARY KEY,
+    source_file     TEXT,
+    document_type   TEXT,
+    invoice_number  TEXT,
+    invoice_date    TEXT,
+    due_date        TEXT,
+    seller_name     TEXT,
+    seller_tax_id   TEXT,
+    buyer_name      TEXT,
+    buyer_tax_id    TEXT,
+    subtotal        REAL,
+    tax_amount      REAL,
+    total           REAL,
+    currency        TEXT,
+    payment_terms   TEXT
+);
+CREATE TABLE IF NOT EXISTS invoice_lines (
+    doc_key         TEXT NOT NULL REFERENCES invoices(doc_key) ON DELETE CASCADE,
+    line_no         INTEGER NOT NULL,
+    description     TEXT,
+    quantity        REAL,
+    unit_price      REAL,
+    tax_rate        REAL,
+    line_total      REAL,
+    PRIMARY KEY (doc_key, line_no)
+);
+CREATE TABLE IF NOT EXISTS indexed_files (
+    path            TEXT PRIMARY KEY,
+    mtime_ns        INTEGER NOT NULL,
+    size            INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_orders_type ON orders(document_type, order_date);
+CREATE INDEX IF NOT EXISTS idx_orders_order_id ON orders(order_id);
+CREATE INDEX IF NOT EXISTS idx_orders_date ON orders(order_date);
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id, order_date);
+CREATE INDEX IF NOT EXISTS idx_orders_customer_name ON orders(customer_name);
+CREATE INDEX IF NOT EXISTS idx_orders_shipper ON orders(shipper_name);
+CREATE INDEX IF NOT EXISTS idx_orders_currency ON orders(currency);
+CREATE INDEX IF NOT EXISTS idx_invoices_type ON invoices(document_type);
+CREATE INDEX IF NOT EXISTS idx_invoices_number ON invoices(invoice_number);
+CREATE INDEX IF NOT EXISTS idx_invoices_date ON invoices(invoice_date);
+CREATE INDEX IF NOT EXISTS idx_invoices_buyer ON invoices(buyer_name, invoice_date);
+CREATE INDEX IF NOT EXISTS idx_invoices_currency ON invoices(currency);
+"""
+
+# Sources de la commande `totals` : colonnes communes doc_date / amount / currency.
+# Les factures de forme « commande » (orders.document_type = 'invoice') sont comptées
+# comme factures. Pour les en-têtes de forme « commande », le client est
+# COALESCE(customer_id, customer_name) : certains documents n'ont que le nom.
+_TOTALS_SOURCES = {
+    "order": (
+        "SELECT COALESCE(customer_id, customer_name) AS customer, shipper_name AS shipper, ship_country AS country, "
+        "currency, order_date AS doc_date, total_price AS amount "
+        "FROM orders WHERE document_type IS NOT 'invoice'"
+    ),
+    "invoice": (
+        "SELECT buyer_name AS customer, seller_name AS seller, "
+        "currency, invoice_date AS doc_date, total AS amount FROM invoices "
+        "UNION ALL "
+        "SELECT COALESCE(customer_id, customer_name), NULL, currency, order_date, total_price "
+        "FROM orders WHERE document_type = 'invoice'"
+    ),
+}
+
+# Colonnes de regroupement autorisées pour la commande `totals`
+_GROUP_COLUMNS = {
+    "order": {
+        "customer": "customer",
+        "currency": "currency",
+        "shipper": "shipper",
+        "country": "country",
+        "month": "substr(doc_date, 1, 7)",
+    },
+    "invoice": {
+        "customer": "customer",
+        "currency": "currency",
+        "seller": "seller",
+        "month": "substr(doc_date, 1, 7)",
+    },
+}
+
+
+_DROP_STATEMENTS = [
+    "DROP TABLE IF EXISTS order_lines", "DROP TABLE IF EXISTS orders",
+    "DROP TABLE IF EXISTS invoice_lines", "DROP TABLE IF EXISTS invoices",
+    "DROP TABLE IF EXISTS indexed_files",
+]
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    """Crée le schéma, ou le reconstruit s'il est d'une version antérieure.
+
+    La vérification et la migration se font sous BEGIN IMMEDIATE : plusieurs processus
+    (ou threads du mode démon) peuvent ouvrir l'index en même temps.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] == _SCHEMA_VERSION:
+        return
+    isolation_level = conn.isolation_level
+    # Transaction gérée manuellement (executescript validerait la transaction en cours)
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Revérifie une fois le verrou obtenu : un autre processus a pu migrer entre-temps
+            if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                for statement in _DROP_STATEMENTS + _SCHEMA.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+
+
+def connect(db_path: Path = INDEX_PATH) -> sqlite3.Connection:
+    """Ouvre (et crée si besoin) la base d'index."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        _ensure_schema(conn)
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def _doc_key(source_file: str) -> str:
+    """Clé d'un document : nom du fichier source sans extension (comme data/output/)."""
+    # PureWindowsPath accepte les séparateurs '\\' et '/'
+    return PureWindowsPath(source_file).stem
+
+
+def _is_invoice(data: Dict[str, Any]) -> bool:
+    """Détermine la table cible d'après la forme du JSON (le libellé est stocké à part)."""
+    return "invoice_number" in data or "items" in data
+
+
+def upsert_document(conn: sqlite3.Connection, document: Union[ExtractedDocument, Dict[str, Any]],
+                    doc_key: Optional[str] = None) -> str:
+    """Insère ou remplace un document (Order / Invoice ou dict JSON) et ses lignes.
+
+    Ne valide pas la transaction : l'appelant regroupe les écritures puis appelle commit().
+    """
+    data = document if isinstance(document, dict) else document.model_dump(mode="json")
+    key = doc_key or _doc_key(data.get("source_file") or "")
+    if not key:
+        raise ValueError("Impossible d'indexer un document sans source_file.")
+
+    # Un document peut changer de type entre deux extractions
+    remove_document(conn, key)
+
+    is_invoice = _is_invoice(data)
+    document_type = (data.get("document_type") or ("invoice" if is_invoice else "order")).lower().strip()
+
+    if is_invoice:
+        seller = data.get("seller") or {}
+        buyer = data.get("buyer") or {}
+        conn.execute(
+            "INSERT INTO invoices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key, data.get("source_file"), document_type, data.get("invoice_number"),
+                data.get("invoice_date"), data.get("due_date"),
+                seller.get("name"), data.get("seller_tax_id"),
+                buyer.get("name"), data.get("buyer_tax_id"),
+                data.get("subtotal"), data.get("tax_amount"), data.get("total"),
+                data.get("currency"), data.get("payment_terms"),
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO invoice_lines VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (key, i, line.get("description"), line.get("quantity"),
+                 line.get("unit_price"), line.get("tax_rate"), line.get("line_total"))
+                for i, line in enumerate(data.get("items") or [])
+            ],
+        )
+    else:
+        shipping = data.get("shipping") or {}
+        conn.execute(
+            "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key, data.get("source_file"), document_type, data.get("order_id"),
+                data.get("order_date"), data.get("shipped_date"),
+                data.get("customer_id"), data.get("customer_name"),
+                data.get("employee_name"), data.get("shipper_id"),
+                data.get("shipper_name"), shipping.get("ship_city"),
+                shipping.get("ship_country"), data.get("total_price"),
+                data.get("currency"),
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO order_lines VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (key, i, line.get("description"), line.get("quantity"),
+                 line.get("unit_price"), line.get("line_total"))
+                for i, line in enumerate(data.get("products") or [])
+            ],
+        )
+    return key
+
+
+def index_file(conn: sqlite3.Connection, json_path: Path, force: bool = False) -> bool:
+    """Indexe un fichier JSON de data/output/ s'il est nouveau ou modifié.
+
+    Retourne True si le fichier a été (ré)indexé, False s'il était déjà à jour.
+    """
+    stat = json_path.stat()
+    path_key = str(json_path.resolve())
+    if not force:
+        row = conn.execute(
+            "SELECT mtime_ns, size FROM indexed_files WHERE path = ?", (path_key,)
+        ).fetchone()
+        if row == (stat.st_mtime_ns, stat.st_size):
+            return False
+
+    with json_path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    upsert_document(conn, data, doc_key=json_path.stem)
+    conn.execute(
+        "INSERT OR REPLACE INTO indexed_files VALUES (?, ?, ?)",
+        (path_key, stat.st_mtime_ns, stat.st_size),
+    )
+    return True
+
+
+def remove_document(conn: sqlite3.Connection, doc_key: str) -> None:
+    """Supprime un document (et ses lignes) de l'index."""
+    conn.execute("DELETE FROM orders WHERE doc_key = ?", (doc_key,))
+    conn.execute("DELETE FROM invoices WHERE doc_key = ?", (doc_key,))
+
+
+def index_directory(conn: sqlite3.Connection, directory: Path = OUTPUT_DIR,
+                    force: bool = False) -> Tuple[int, int, int, int]:
+    """Indexe incrémentalement tous les JSON d'un dossier.
+
+    Un fichier invalide est signalé puis ignoré sans annuler les autres ; les documents
+    dont le JSON a été supprimé du dossier sont retirés de l'index.
+    Retourne (indexés, inchangés, en erreur, supprimés).
+    """
+    indexed, unchanged, failed, removed = 0, 0, 0, 0
+    present = set()
+    with conn:
+        for json_path in sorted(directory.glob("*.json")):
+            present.add(str(json_path.resolve()))
+            conn.execute("SAVEPOINT index_file")
+            try:
+                if index_file(conn, json_path, force=force):
+                    indexed += 1
+                else:
+                    unchanged += 1
+            except Exception as exc:
+                conn.execute("ROLLBACK TO index_file")
+                print(f"  ERREUR d'indexation sur {json_path.name} : {exc}")
+                failed += 1
+            conn.execute("RELEASE index_file")
+
+        directory_key = directory.resolve()
+        for (path_key,) in conn.execute("SELECT path FROM indexed_files").fetchall():
+            if Path(path_key).parent == directory_key and path_key not in present:
+                remove_document(conn, Path(path_key).stem)
+                conn.execute("DELETE FROM indexed_files WHERE path = ?", (path_key,))
+                removed += 1
+    return indexed, unchanged, failed, removed
+
+
+def totals(conn: sqlite3.Connection, doc_type: str = "invoice", by: str = "customer",
+           since: Optional[str] = None, until: Optional[str] = None,
+           currency: Optional[str] = None) -> List[Tuple[Any, ...]]:
+    """Montant total et nombre de documents, regroupés par `by` sur une période.
+
+    Les dates sont comparées en ISO (YYYY-MM-DD), `until` inclus. Pour `invoice`,
+    les factures de forme « commande » sont incluses (voir _TOTALS_SOURCES).
+    """
+    columns = _GROUP_COLUMNS.get(doc_type)
+    if columns is None:
+        raise ValueError(f"Type de document inconnu : {doc_type}")
+    if by not in columns:
+        raise ValueError(f"Regroupement '{by}' non supporté (choix : {', '.join(columns)})")
+
+    where, params = [], []
+    if since:
+        where.append("doc_date >= ?")
+        params.append(since)
+    if until:
+        where.append("doc_date <= ?")
+        params.append(until)
+    if currency:
+        where.append("currency = ?")
+        params.append(currency)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    group = columns[by]
+    # La devise fait partie du regroupement : on n'additionne pas des EUR et des USD
+    select_group = group if by == "currency" else f"{group}, currency"
+    query = (
+        f"SELECT {select_group}, COUNT(*), ROUND(SUM(amount), 2) "
+        f"FROM ({_TOTALS_SOURCES[doc_type]}) {where_sql} GROUP BY {select_group} "
+        f"ORDER BY SUM(amount) DESC"
+    )
+    return conn.execute(query, params).fetchall()
+
+
+def find_orders(conn: sqlite3.Connection, shipper: Optional[str] = None,
+                customer: Optional[str] = None, since: Optional[str] = None,
+                until: Optional[str] = None) -> List[Tuple[Any, ...]]:
+    """Liste les commandes (hors factures de forme « commande ») filtrées par transporteur,
+    client et/ou période."""
+    where, params = ["document_type IS NOT 'invoice'"], []
+    if shipper:
+        where.append("(shipper_name = ? OR shipper_id = ?)")
+        params.extend([shipper, shipper])
+    if customer:
+        where.append("(customer_id = ? OR customer_name = ?)")
+        params.extend([customer, customer])
+    if since:
+        where.append("order_date >= ?")
+        params.append(since)
+    if until:
+        where.append("order_date <= ?")
+        params.append(until)
+    query = (
+        "SELECT order_id, order_date, shipped_date, customer_id, shipper_name, total_price, currency "
+        f"FROM orders WHERE {' AND '.join(where)} ORDER BY order_date, order_id"
+    )
+    return conn.execute(query, params).fetchall()
+
+
+def _print_rows(headers: Iterable[str], rows: List[Tuple[Any, ...]]) -> None:
+    """Affiche des lignes de résultats sous forme de tableau texte."""
+    headers = list(headers)
+    cells = [[("" if v is None else str(v)) for v in row] for row in rows]
+    widths = [max([len(h)] + [len(r[i]) for r in cells]) for i, h in enumerate(headers)]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+    print(f"({len(rows)} ligne(s))")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """CLI de requêtage de l'index."""
+    parser = argparse.ArgumentParser(prog="python -m src.index", description="Index SQLite des documents extraits.")
+    parser.add_argument("--db", type=Path, default=INDEX_PATH, help="Chemin de la base SQLite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Indexe les JSON d'un dossier (incrémental)")
+    p_build.add_argument("directory", nargs="?", type=Path, default=OUTPUT_DIR)
+    p_build.add_argument("--force", action="store_true", help="Réindexe tous les fichiers")
+
+    p_totals = sub.add_parser("totals", help="Montants agrégés")
+    p_totals.add_argument("--type", dest="doc_type", choices=["invoice", "order"], default="invoice")
+    p_totals.add_argument("--by", default="customer")
+    p_totals.add_argument("--since")
+    p_totals.add_argument("--until")
+    p_totals.add_argument("--currency")
+
+    p_orders = sub.add_parser("orders", help="Liste des commandes filtrées")
+    p_orders.add_argument("--shipper")
+    p_orders.add_argument("--customer")
+    p_orders.add_argument("--since")
+    p_orders.add_argument("--until")
+
+    p_sql = sub.add_parser("sql", help="Requête SQL libre (lecture seule)")
+    p_sql.add_argument("query")
+
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    try:
+        if args.command == "build":
+            indexed, unchanged, failed, removed = index_directory(conn, args.directory, force=args.force)
+            print(f"=== Index : {indexed} indexé(s), {unchanged} inchangé(s), {failed} erreur(s), "
+                  f"{removed} supprimé(s) → {args.db} ===")
+            if failed:
+                sys.exit(1)
+        elif args.command == "totals":
+            try:
+                rows = totals(conn, args.doc_type, args.by, args.since, args.until, args.currency)
+            except ValueError as exc:
+                print(f"Erreur : {exc}")
+                sys.exit(1)
+            headers = [args.by] if args.by == "currency" else [args.by, "currency"]
+            _print_rows(headers + ["documents", "total"], rows)
+        elif args.command == "orders":
+            rows = find_orders(conn, args.shipper, args.customer, args.since, args.until)
+            _print_rows(["order_id", "order_date", "shipped_date", "customer_id",
+                         "shipper_name", "total_price", "currency"], rows)
+        elif args.command == "sql":
+            conn.execute("PRAGMA query_only=ON")
+            try:
+                cursor = conn.execute(args.query)
+            except sqlite3.Error as exc:
+                print(f"Erreur SQL : {exc}")
+                sys.exit(1)
+            _print_rows([d[0] for d in cursor.description or []], cursor.fetchall())
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -219,6 +219,22 @@ def _extract_structured_from_image(image_path: Path, model_class: Type[BaseModel
     return model_class.model_validate_json(content)
 
 
+class _PageTextResult(BaseModel):
+    """Transcription du texte d'une page scannée."""
+    text: str = Field(description="Texte intégral de la page, dans l'ordre de lecture")
+
+
+def extract_page_text_from_image(image_path: Path) -> str:
+    """Transcrit le texte d'une page de PDF sans couche texte (rendue en image) via GPT-4 Vision."""
+    system_msg = "Tu es un assistant qui transcrit fidèlement le texte de documents commerciaux scannés."
+    prompt = (
+        "Transcris tout le texte visible sur cette page de document, dans l'ordre de lecture.\n"
+        "Conserve les libellés, montants, dates et lignes de tableau tels quels, sans les interpréter."
+    )
+    result = _extract_structured_from_image(image_path, _PageTextResult, system_msg, prompt)
+    return result.text
+
+
 def detect_document_type_from_image(image_path: Path) -> str:
     """Identifie le type de document (order / invoice) depuis une image via GPT-4 Vision."""
     system_msg = "Tu es un assistant spécialisé dans la classification de documents commerciaux."
@@ -1,20 +1,28 @@
 """Point d'entrée – extraction de documents non structurés en JSON."""
 
 import json
+import sqlite3
 import sys
 from pathlib import Path
+from typing import Optional
 
 try:
     from .extractors import extract_document
+    from . import index
 except ImportError:
     from extractors import extract_document
+    import index
 
 INPUT_DIR = Path(__file__).resolve().parent.parent / "data" / "input"
 OUTPUT_DIR = Path(__file__).resolve().parent.parent / "data" / "output"
 
+# Extensions supportées
+SUPPORTED_EXTS = {".pdf", ".docx", ".txt", ".text", ".xlsx", ".xls", ".csv"}
 
-def process_one(file_path: Path, output_path: Path) -> None:
-    """Traite un fichier : détection du type, extraction, écriture JSON."""
+
+def process_one(file_path: Path, output_path: Path,
+                index_conn: Optional[sqlite3.Connection] = None) -> None:
+    """Traite un fichier : détection du type, extraction, écriture JSON (et indexation)."""
     print(f"\n--- Traitement : {file_path.name} ---")
 
     document = extract_document(file_path)
@@ -27,12 +35,39 @@ def process_one(file_path: Path, output_path: Path) -> None:
 
     print(f"  OK → {output_path}")
 
+    if index_conn is not None:
+        # L'extraction a réussi : une erreur d'index est signalée sans faire échouer le fichier
+        try:
+            with index_conn:
+                index.index_file(index_conn, output_path, force=True)
+        except Exception as exc:
+            print(f"  ERREUR d'indexation sur {output_path.name} : {exc}")
+
+
+def open_index() -> Optional[sqlite3.Connection]:
+    """Ouvre l'index SQLite ; en cas d'échec, avertit et retourne None (extraction sans index)."""
+    try:
+        return index.connect()
+    except (OSError, sqlite3.Error) as exc:
+        print(f"  AVERTISSEMENT : index indisponible ({exc}), les résultats ne seront pas indexés.")
+        return None
+
 
 def main() -> None:
-    """Traite tous les fichiers de data/input/ ou un chemin passé en argument."""
-    # Extensions supportées
-    SUPPORTED_EXTS = {".pdf", ".docx", ".txt", ".text", ".xlsx", ".xls", ".csv"}
-    
+    """Traite tous les fichiers de data/input/ ou un chemin passé en argument.
+
+    Avec --watch, lance le mode démon qui surveille le dossier d'entrée (voir watcher.py).
+    """
+    args = sys.argv[1:]
+    if "--watch" in args:
+        try:
+            from . import watcher
+        except ImportError:
+            import watcher
+        # --watch peut apparaître à n'importe quelle position (ex. : data/input --watch)
+        watcher.main([arg for arg in args if arg != "--watch"])
+        return
+
     if len(sys.argv) > 1:
         target = Path(sys.argv[1])
         if target.is_dir():
@@ -53,14 +88,19 @@ def main() -> None:
     print(f"=== NAF_ISB – {len(files)} fichier(s) à traiter ===")
 
     ok, ko = 0, 0
-    for file in files:
-        out = OUTPUT_DIR / (file.stem + ".json")
-        try:
-            process_one(file, out)
-            ok += 1
-        except Exception as exc:
-            print(f"  ERREUR sur {file.name} : {exc}")
-            ko += 1
+    index_conn = open_index()
+    try:
+        for file in files:
+            out = OUTPUT_DIR / (file.stem + ".json")
+            try:
+                process_one(file, out, index_conn)
+                ok += 1
+            except Exception as exc:
+                print(f"  ERREUR sur {file.name} : {exc}")
+                ko += 1
+    finally:
+        if index_conn is not None:
+            index_conn.close()
 
     print(f"\n=== Résumé : {ok} réussi(s), {ko} erreur(s) ===")
 
@@ -0,0 +1,295 @@
+"""Mode démon – surveille un dossier d'entrée et extrait les fichiers au fil de l'eau.
+
+Les créations / modifications sont signalées par le système de fichiers (inotify via
+watchdog). Sans watchdog, ou si l'observateur ne peut pas démarrer, un scan périodique
+du dossier prend le relais. Un fichier n'est extrait qu'une fois stable (taille et date
+inchangées pendant `settle` secondes), avec un nombre borné d'extractions simultanées.
+
+Usage :
+    python -m src.main --watch [dossier] [--workers 4] [--poll] [--backlog]
+    python -m src.watcher [dossier] [--workers 4] [--poll] [--backlog]
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+try:
+    from .main import INPUT_DIR, OUTPUT_DIR, SUPPORTED_EXTS, open_index, process_one
+except ImportError:
+    from main import INPUT_DIR, OUTPUT_DIR, SUPPORTED_EXTS, open_index, process_one
+
+# Durée (s) pendant laquelle un fichier doit rester inchangé avant d'être traité
+SETTLE_SECONDS = 1.0
+# Intervalle (s) entre deux scans en mode polling
+POLL_INTERVAL = 2.0
+# Période (s) de la boucle de répartition des fichiers prêts
+TICK_SECONDS = 0.2
+DEFAULT_WORKERS = 4
+
+# État d'un fichier : (mtime_ns, taille)
+_FileState = Tuple[int, int]
+
+
+def _file_state(path: Path) -> Optional[_FileState]:
+    """Retourne (mtime_ns, taille) du fichier, ou None s'il n'existe plus."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _is_candidate(path: Path) -> bool:
+    """Filtre les fichiers supportés (ignore fichiers cachés et verrous Office)."""
+    return path.suffix.lower() in SUPPORTED_EXTS and not path.name.startswith((".", "~$"))
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Relaie les événements watchdog vers le FolderWatcher."""
+
+    def __init__(self, watcher: "FolderWatcher") -> None:
+        super().__init__()
+        self._watcher = watcher
+
+    def on_created(self, event) -> None:
+        if not event.is_directory:
+            self._watcher.notify(Path(event.src_path))
+
+    def on_modified(self, event) -> None:
+        if not event.is_directory:
+            self._watcher.notify(Path(event.src_path))
+
+    def on_closed(self, event) -> None:
+        if not event.is_directory:
+            self._watcher.notify(Path(event.src_path))
+
+    def on_moved(self, event) -> None:
+        # Écriture atomique fréquente : fichier temporaire puis renommage
+        if not event.is_directory:
+            self._watcher.forget(Path(event.src_path))
+            self._watcher.notify(Path(event.dest_path))
+
+    def on_deleted(self, event) -> None:
+        if not event.is_directory:
+            self._watcher.forget(Path(event.src_path))
+
+
+class FolderWatcher:
+    """Surveille un dossier et alimente l'extraction avec les fichiers nouveaux ou modifiés.
+
+    Les événements sont regroupés par fichier (debounce) ; un fichier stable reste en
+    attente jusqu'à ce qu'un worker soit libre, et n'est retraité que si son contenu
+    change. À l'arrêt, seules les extractions déjà en cours sont terminées.
+    """
+
+    def __init__(self, input_dir: Path = INPUT_DIR, output_dir: Path = OUTPUT_DIR,
+                 workers: int = DEFAULT_WORKERS, settle: float = SETTLE_SECONDS,
+                 poll_interval: float = POLL_INTERVAL, use_polling: bool = False) -> None:
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.workers = workers
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling or Observer is None
+        # Désactivé dans run() si l'index ne peut pas être ouvert
+        self.use_index = True
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        # Fichiers en attente : chemin → (premier événement, dernier changement, état observé)
+        self._pending: Dict[Path, Tuple[float, float, Optional[_FileState]]] = {}
+        self._in_flight: Set[Path] = set()
+        # Dernier état traité de chaque fichier (évite les retraitements)
+        self._done: Dict[Path, _FileState] = {}
+        # Dernier état vu par le scan de polling
+        self._seen: Dict[Path, _FileState] = {}
+
+    def notify(self, path: Path) -> None:
+        """Signale qu'un fichier a été créé ou modifié (appelé par l'observateur ou le scan)."""
+        if not _is_candidate(path):
+            return
+        now = time.monotonic()
+        state = _file_state(path)
+        with self._lock:
+            first_seen = self._pending[path][0] if path in self._pending else now
+            self._pending[path] = (first_seen, now, state)
+
+    def forget(self, path: Path) -> None:
+        """Oublie un fichier supprimé ou déplacé (évite la croissance de l'état en mémoire)."""
+        with self._lock:
+            self._pending.pop(path, None)
+            self._done.pop(path, None)
+            self._seen.pop(path, None)
+
+    def stop(self) -> None:
+        """Demande l'arrêt de la boucle principale."""
+        self._stop.set()
+
+    def _bootstrap(self, backlog: bool) -> None:
+        """Enregistre les fichiers déjà présents au démarrage.
+
+        Sans `backlog`, ils sont considérés comme traités ; avec `backlog`, ceux dont
+        le JSON de sortie est absent ou plus ancien que la source sont mis en file.
+        """
+        for path, state in self._scan_directory():
+            self._seen[path] = state
+            output_state = _file_state(self.output_dir / (path.stem + ".json"))
+            if backlog and (output_state is None or output_state[0] < state[0]):
+                self.notify(path)
+            else:
+                self._done[path] = state
+
+    def _scan_directory(self) -> List[Tuple[Path, _FileState]]:
+        """Liste (chemin, état) des fichiers supportés du dossier d'entrée."""
+        entries = []
+        with os.scandir(self.input_dir) as it:
+            for entry in it:
+                path = Path(entry.path)
+                if not entry.is_file() or not _is_candidate(path):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((path, (stat.st_mtime_ns, stat.st_size)))
+        return entries
+
+    def _poll(self) -> None:
+        """Scan de repli : signale les fichiers dont l'état a changé depuis le scan précédent
+        et oublie ceux qui ont disparu du dossier."""
+        entries = self._scan_directory()
+        for path, state in entries:
+            if self._seen.get(path) != state:
+                self._seen[path] = state
+                self.notify(path)
+        present = {path for path, _ in entries}
+        for path in [p for p in self._seen if p not in present]:
+            self.forget(path)
+
+    def _dispatch_ready(self) -> None:
+        """Soumet au pool les fichiers en attente devenus stables."""
+        now = time.monotonic()
+        with self._lock:
+            for path, (first_seen, last_change, state) in list(self._pending.items()):
+                current = _file_state(path)
+                if current is None:
+                    # Fichier supprimé ou renommé entre-temps
+                    del self._pending[path]
+                    self._done.pop(path, None)
+                    self._seen.pop(path, None)
+                    continue
+                if current != state:
+                    # Encore en cours d'écriture : on relance l'attente
+                    self._pending[path] = (first_seen, now, current)
+                    continue
+                if now - last_change < self.settle or path in self._in_flight:
+                    continue
+                if self._done.get(path) == current:
+                    del self._pending[path]
+                    continue
+                if len(self._in_flight) >= self.workers:
+                    # Pool saturé : le fichier reste en attente (ordre d'arrivée conservé)
+                    continue
+                del self._pending[path]
+                self._in_flight.add(path)
+                self._executor.submit(self._process, path, current, first_seen)
+
+    def _process(self, path: Path, state: _FileState, first_seen: float) -> None:
+        """Extrait un fichier (thread du pool), écrit le JSON et met à jour l'index."""
+        out = self.output_dir / (path.stem + ".json")
+        index_conn = None
+        try:
+            if self.use_index:
+                index_conn = open_index()
+            process_one(path, out, index_conn)
+            print(f"  Latence sur {path.name} : {time.monotonic() - first_seen:.1f} s")
+        except Exception as exc:
+            print(f"  ERREUR sur {path.name} : {exc}")
+        finally:
+            if index_conn is not None:
+                index_conn.close()
+            with self._lock:
+                # En cas d'erreur aussi : seul un nouvel enregistrement du fichier relance l'extraction
+                if _file_state(path) is not None:
+                    self._done[path] = state
+                self._in_flight.discard(path)
+
+    def run(self, backlog: bool = False) -> None:
+        """Boucle principale du démon (bloquante jusqu'à stop() ou Ctrl+C)."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Ouvre (crée / migre) l'index une seule fois avant le démarrage des workers :
+        # leurs connexions trouvent ensuite un schéma à jour
+        index_conn = open_index()
+        self.use_index = index_conn is not None
+        if index_conn is not None:
+            index_conn.close()
+        self._bootstrap(backlog)
+
+        observer = None
+        if not self.use_polling:
+            try:
+                observer = Observer()
+                observer.schedule(_EventHandler(self), str(self.input_dir), recursive=False)
+                observer.start()
+            except OSError as exc:
+                print(f"Observateur indisponible ({exc}), repli sur le polling.")
+                observer = None
+
+        mode = "événements système" if observer is not None else f"polling toutes les {self.poll_interval:g} s"
+        print(f"=== NAF_ISB – surveillance de {self.input_dir} ({mode}) ===")
+
+        next_poll = 0.0
+        try:
+            while not self._stop.is_set():
+                if observer is None and time.monotonic() >= next_poll:
+                    self._poll()
+                    next_poll = time.monotonic() + self.poll_interval
+                self._dispatch_ready()
+                self._stop.wait(TICK_SECONDS)
+        except KeyboardInterrupt:
+            print("\nArrêt demandé, fin des extractions en cours...")
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """CLI du mode démon."""
+    parser = argparse.ArgumentParser(prog="python -m src.main --watch",
+                                     description="Surveille un dossier et extrait les nouveaux fichiers.")
+    parser.add_argument("directory", nargs="?", type=Path, default=INPUT_DIR)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Extractions simultanées")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="Secondes sans modification avant traitement")
+    parser.add_argument("--poll", action="store_true", help="Force le mode polling (sans inotify)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Intervalle de polling (s)")
+    parser.add_argument("--backlog", action="store_true",
+                        help="Traite aussi les fichiers présents sans JSON à jour")
+    args = parser.parse_args(argv)
+
+    if not args.directory.is_dir():
+        print(f"Erreur : '{args.directory}' n'est pas un dossier.")
+        raise SystemExit(1)
+
+    watcher = FolderWatcher(args.directory, OUTPUT_DIR, workers=max(1, args.workers),
+                            settle=args.settle, poll_interval=args.interval, use_polling=args.poll)
+    watcher.run(backlog=args.backlog)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Tests du repli Vision page par page pour les PDF scannés (src/extractors.py)."""
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pytest
+
+from src import extractors
+
+
+# Taille des pages du PDF de test (points)
+PAGE_SIZE = (300, 200)
+FULL_PAGE_IMAGE = PAGE_SIZE
+LOGO_IMAGE = (40, 30)
+
+
+def _make_pdf(path: Path, pages: List[Tuple[Optional[str], Optional[Tuple[int, int]]]]) -> Path:
+    """Écrit un PDF minimal : chaque page = (texte ou None, taille affichée de l'image ou None)."""
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        4: (b"<< /Type /XObject /Subtype /Image /Width 2 /Height 2 /ColorSpace /DeviceGray "
+            b"/BitsPerComponent 8 /Length 4 >>\nstream\n\x00\xff\xff\x00\nendstream"),
+    }
+    kids = []
+    next_id = 5
+    for text, image_size in pages:
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        content = b""
+        if text:
+            content += b"BT /F1 12 Tf 20 150 Td (" + text.encode("latin-1") + b") Tj ET\n"
+        if image_size:
+            content += b"q %d 0 0 %d 0 0 cm /Im1 Do Q\n" % image_size
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> /XObject << /Im1 4 0 R >> >> "
+            b"/Contents %d 0 R >>" % (PAGE_SIZE + (content_id,))
+        )
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    data = b"%PDF-1.4\n"
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(data)
+        data += b"%d 0 obj\n%s\nendobj\n" % (obj_id, objects[obj_id])
+    xref_offset = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for obj_id in sorted(objects):
+        data += b"%010d 00000 n \n" % offsets[obj_id]
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    path.write_bytes(data)
+    return path
+
+
+def test_only_image_pages_are_sent_to_vision(tmp_path, monkeypatch):
+    pdf_path = _make_pdf(tmp_path / "mixte.pdf", [
+        ("Order ID 10999 - Customer OTTIK - Total 1261.00", None),
+        (None, FULL_PAGE_IMAGE),
+        ("Page 3/3", None),
+    ])
+    calls = []
+
+    def fake_vision(image_path: Path) -> str:
+        assert image_path.exists()
+        calls.append(image_path.name)
+        return "Shipper United Package"
+
+    monkeypatch.setattr(extractors, "extract_page_text_from_image", fake_vision)
+
+    text = extractors._extract_text_from_pdf(pdf_path)
+
+    assert calls == ["page_2.png"]
+    assert text.split("\n") == [
+        "Order ID 10999 - Customer OTTIK - Total 1261.00",
+        "Shipper United Package",
+        "Page 3/3",
+    ]
+
+
+def test_short_page_with_small_logo_keeps_native_text(tmp_path, monkeypatch):
+    pdf_path = _make_pdf(tmp_path / "logo.pdf", [
+        ("Invoice 11059 - Customer RICAR - Total 1838.00", LOGO_IMAGE),
+        ("Page 2/2", LOGO_IMAGE),
+    ])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Une page avec un simple logo ne doit pas passer par Vision")
+
+    monkeypatch.setattr(extractors, "extract_page_text_from_image", fail)
+
+    text = extractors._extract_text_from_pdf(pdf_path)
+
+    assert text.split("\n") == ["Invoice 11059 - Customer RICAR - Total 1838.00", "Page 2/2"]
+
+
+def test_empty_document_raises_before_llm_call(tmp_path, monkeypatch):
+    pdf_path = _make_pdf(tmp_path / "vide.pdf", [(None, None), (None, None)])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Aucun appel LLM attendu")
+
+    monkeypatch.setattr(extractors, "extract_page_text_from_image", fail)
+    monkeypatch.setattr(extractors, "detect_document_type", fail)
+
+    with pytest.raises(RuntimeError, match="Aucun texte exploitable"):
+        extractors.extract_document(pdf_path)
@@ -0,0 +1,158 @@
+"""Tests de l'index SQLite des documents extraits (src/index.py)."""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from src import index
+
+ORDER = {
+    "source_file": "C:\\data\\input\\order_10999.pdf",
+    "document_type": "Order",
+    "order_id": "10999",
+    "order_date": "2018-04-03",
+    "customer_id": "OTTIK",
+    "shipper_name": "United Package",
+    "shipping": {"ship_city": "Köln", "ship_country": "Germany"},
+    "products": [
+        {"description": "Clam Chowder", "quantity": 20.0, "unit_price": 9.65, "line_total": 193.0},
+        {"description": "Dried Apples", "quantity": 15.0, "unit_price": 53.0, "line_total": 795.0},
+    ],
+    "total_price": 988.0,
+    "currency": "EUR",
+}
+
+INVOICE = {
+    "source_file": "data/input/facture_001.pdf",
+    "document_type": "invoice",
+    "invoice_number": "FAC-2024-001",
+    "invoice_date": "2024-01-15",
+    "buyer": {"name": "Client XYZ"},
+    "items": [{"description": "Prestation", "quantity": 1, "unit_price": 1500.0, "line_total": 1500.0}],
+    "total": 1800.0,
+    "currency": "EUR",
+}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = index.connect(tmp_path / "index.sqlite")
+    yield connection
+    connection.close()
+
+
+def _write_json(path: Path, data: dict) -> Path:
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+def _count(conn: sqlite3.Connection, table: str) -> int:
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_upsert_replaces_document_that_changes_type(conn):
+    with conn:
+        index.upsert_document(conn, ORDER, doc_key="doc")
+    assert (_count(conn, "orders"), _count(conn, "order_lines")) == (1, 2)
+
+    with conn:
+        index.upsert_document(conn, INVOICE, doc_key="doc")
+    assert (_count(conn, "orders"), _count(conn, "order_lines")) == (0, 0)
+    assert (_count(conn, "invoices"), _count(conn, "invoice_lines")) == (1, 1)
+
+
+def test_doc_key_defaults_to_source_file_stem(conn):
+    with conn:
+        key = index.upsert_document(conn, ORDER)
+    assert key == "order_10999"
+
+
+def test_index_directory_skips_unchanged_files(conn, tmp_path):
+    out = tmp_path / "output"
+    out.mkdir()
+    order_path = _write_json(out / "order_10999.json", ORDER)
+
+    assert index.index_directory(conn, out) == (1, 0, 0, 0)
+    assert index.index_directory(conn, out) == (0, 1, 0, 0)
+
+    # Même taille, date différente : le fichier est relu
+    stat = order_path.stat()
+    os.utime(order_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert index.index_directory(conn, out) == (1, 0, 0, 0)
+
+
+def test_index_directory_prunes_deleted_files(conn, tmp_path):
+    out = tmp_path / "output"
+    out.mkdir()
+    _write_json(out / "order_10999.json", ORDER)
+    invoice_path = _write_json(out / "facture_001.json", INVOICE)
+    index.index_directory(conn, out)
+
+    invoice_path.unlink()
+
+    assert index.index_directory(conn, out) == (0, 1, 0, 1)
+    assert _count(conn, "invoices") == 0
+    assert _count(conn, "invoice_lines") == 0
+    assert _count(conn, "orders") == 1
+
+
+def test_bad_file_does_not_roll_back_the_others(conn, tmp_path):
+    out = tmp_path / "output"
+    out.mkdir()
+    _write_json(out / "a_bad.json", dict(ORDER, shipping="pas un objet"))
+    _write_json(out / "order_10999.json", ORDER)
+    (out / "z_truncated.json").write_text("{", encoding="utf-8")
+
+    assert index.index_directory(conn, out) == (1, 0, 2, 0)
+    assert [row[0] for row in conn.execute("SELECT doc_key FROM orders")] == ["order_10999"]
+    assert _count(conn, "indexed_files") == 1
+
+
+def test_totals_routes_order_shaped_invoices_to_invoice_totals(conn):
+    # Forme des fichiers invoice_1105x.json livrés : champs de commande, libellé « Invoice »
+    order_shaped_invoice = dict(ORDER, document_type="Invoice", customer_id="RICAR", total_price=1838.0)
+    purchase_order = dict(ORDER, document_type="purchase order", order_id="11011", customer_id=None,
+                          customer_name="Maria Anders", total_price=960.0, currency="USD")
+    with conn:
+        index.upsert_document(conn, ORDER, doc_key="order")
+        index.upsert_document(conn, order_shaped_invoice, doc_key="invoice_order_shaped")
+        index.upsert_document(conn, purchase_order, doc_key="purchase_order")
+        index.upsert_document(conn, INVOICE, doc_key="invoice")
+
+    assert index.totals(conn, "invoice", "customer") == [
+        ("RICAR", "EUR", 1, 1838.0),
+        ("Client XYZ", "EUR", 1, 1800.0),
+    ]
+    assert index.totals(conn, "order", "customer") == [
+        ("OTTIK", "EUR", 1, 988.0),
+        ("Maria Anders", "USD", 1, 960.0),
+    ]
+    assert index.totals(conn, "invoice", "month", since="2024-01-01", until="2024-01-31") == [
+        ("2024-01", "EUR", 1, 1800.0),
+    ]
+    assert [row[0] for row in index.find_orders(conn)] == ["10999", "11011"]
+
+
+def test_totals_rejects_unknown_grouping(conn):
+    with pytest.raises(ValueError):
+        index.totals(conn, "invoice", "shipper")
+
+
+def test_connect_rebuilds_outdated_schema(tmp_path):
+    db_path = tmp_path / "index.sqlite"
+    old = sqlite3.connect(db_path)
+    old.execute("CREATE TABLE orders (doc_key TEXT PRIMARY KEY)")
+    old.execute("PRAGMA user_version = 1")
+    old.commit()
+    old.close()
+
+    conn = index.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == index._SCHEMA_VERSION
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(orders)")]
+        assert "document_type" in columns
+    finally:
+        conn.close()
@@ -0,0 +1,145 @@
+"""Tests du mode démon (src/watcher.py), avec une extraction simulée."""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+from src import watcher
+
+SETTLE = 0.2
+
+
+@pytest.fixture
+def processed(monkeypatch) -> List[str]:
+    """Remplace l'extraction par un enregistrement des fichiers traités."""
+    calls: List[str] = []
+
+    def fake_process_one(path: Path, output_path: Path, index_conn) -> None:
+        calls.append(path.name)
+
+    monkeypatch.setattr(watcher, "process_one", fake_process_one)
+    monkeypatch.setattr(watcher, "open_index", lambda: None)
+    return calls
+
+
+def _make_watcher(tmp_path: Path, workers: int = 2) -> watcher.FolderWatcher:
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    input_dir.mkdir(exist_ok=True)
+    output_dir.mkdir(exist_ok=True)
+    return watcher.FolderWatcher(input_dir, output_dir, workers=workers, settle=SETTLE, use_polling=True)
+
+
+def _wait_until(condition: Callable[[], bool], w: watcher.FolderWatcher, timeout: float = 5.0) -> None:
+    """Fait tourner la boucle de répartition jusqu'à ce que `condition` soit vraie."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "délai dépassé"
+        w._dispatch_ready()
+        time.sleep(0.02)
+
+
+def test_file_is_processed_once_stable(tmp_path, processed):
+    w = _make_watcher(tmp_path)
+    path = w.input_dir / "order.pdf"
+    path.write_bytes(b"debut")
+    w.notify(path)
+
+    # Écriture encore en cours : chaque modification relance l'attente
+    for _ in range(3):
+        time.sleep(SETTLE / 2)
+        with path.open("ab") as f:
+            f.write(b" suite")
+        w.notify(path)
+        w._dispatch_ready()
+        assert processed == []
+
+    _wait_until(lambda: processed == ["order.pdf"], w)
+    w._executor.shutdown(wait=True)
+
+
+def test_unchanged_file_is_not_reprocessed(tmp_path, processed):
+    w = _make_watcher(tmp_path)
+    path = w.input_dir / "order.pdf"
+    path.write_bytes(b"v1")
+    w.notify(path)
+    _wait_until(lambda: not w._pending and not w._in_flight, w)
+
+    # Nouvel événement sans modification du contenu
+    w.notify(path)
+    time.sleep(SETTLE * 1.5)
+    _wait_until(lambda: not w._pending, w)
+    assert processed == ["order.pdf"]
+
+    # Contenu modifié : nouvelle extraction
+    path.write_bytes(b"version 2")
+    w.notify(path)
+    _wait_until(lambda: len(processed) == 2, w)
+    w._executor.shutdown(wait=True)
+
+
+def test_backlog_selects_files_without_up_to_date_json(tmp_path, processed):
+    w = _make_watcher(tmp_path)
+    for name in ("a_jour", "sans_json", "json_perime"):
+        (w.input_dir / f"{name}.pdf").write_bytes(b"x")
+    source_mtime = (w.input_dir / "a_jour.pdf").stat().st_mtime
+    for name, offset in (("a_jour", 60), ("json_perime", -60)):
+        output = w.output_dir / f"{name}.json"
+        output.write_text("{}")
+        os.utime(output, (source_mtime + offset, source_mtime + offset))
+
+    w._bootstrap(backlog=True)
+    assert sorted(p.name for p in w._pending) == ["json_perime.pdf", "sans_json.pdf"]
+
+    fresh = _make_watcher(tmp_path)
+    fresh._bootstrap(backlog=False)
+    assert not fresh._pending
+    assert len(fresh._done) == 3
+
+
+def test_concurrency_is_bounded_by_workers(tmp_path, monkeypatch):
+    release = threading.Event()
+    calls: List[str] = []
+
+    def blocking_process_one(path: Path, output_path: Path, index_conn) -> None:
+        calls.append(path.name)
+        release.wait(timeout=5)
+
+    monkeypatch.setattr(watcher, "process_one", blocking_process_one)
+    monkeypatch.setattr(watcher, "open_index", lambda: None)
+
+    w = _make_watcher(tmp_path, workers=2)
+    for i in range(5):
+        path = w.input_dir / f"f{i}.pdf"
+        path.write_bytes(b"x")
+        w.notify(path)
+
+    _wait_until(lambda: len(calls) == 2, w)
+    time.sleep(SETTLE)
+    w._dispatch_ready()
+    # Les fichiers prêts restent en attente tant que le pool est saturé
+    assert len(w._in_flight) == 2
+    assert len(w._pending) == 3
+    assert len(calls) == 2
+
+    release.set()
+    _wait_until(lambda: len(calls) == 5 and not w._in_flight, w)
+    w._executor.shutdown(wait=True)
+
+
+def test_deleted_files_are_forgotten(tmp_path, processed):
+    w = _make_watcher(tmp_path)
+    path = w.input_dir / "order.pdf"
+    path.write_bytes(b"x")
+    w._poll()
+    _wait_until(lambda: processed == ["order.pdf"] and not w._in_flight, w)
+    assert path in w._done and path in w._seen
+
+    path.unlink()
+    w._poll()
+    assert path not in w._done
+    assert path not in w._seen
+    w._executor.shutdown(wait=True)